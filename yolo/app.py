@@ -1,11 +1,22 @@
 import streamlit as st
 import cv2
+import numpy as np
 import os
-import uuid
+import json
+import hashlib
+import shutil
+import tempfile
+import time
+import types
 import subprocess
+import queue
+import threading
 import imageio_ffmpeg
+import torch
 from ultralytics import YOLO
 from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Tuple
 import logging
@@ -14,15 +25,46 @@ class Config:
    
     UPLOAD_DIR = Path("uploads")
     OUTPUT_DIR = Path("outputs")
+    OUTPUT_CACHE_MAX_BYTES = 10 * 1024 ** 3  # uploads + outputs
+    TEMP_FILE_MAX_AGE = 3600
     MODEL_PATH = Path("model/best.pt")
+    ENGINE_PATH = Path("model/best.engine")
+    ENGINE_SETTINGS_PATH = Path("model/best.engine.json")
+    CSS_PATH = Path(__file__).parent / "static" / "styles.css"
     
     # Model parameters
     CONFIDENCE_THRESHOLD = 0.4
     DEFAULT_FPS = 25
-    VIDEO_CODEC = "mp4v"
+    BATCH_SIZE = 16
+    PIPELINE_QUEUE_SIZE = 32
+    LOG_EVERY_N_FRAMES = 100
+    JOB_POLL_INTERVAL = 0.2
+    FRAME_STRIDE = 3  # run detection on every Nth frame
+    BOX_THICKNESS = 2
+    LABEL_FONT_SCALE = 0.5
     H264_CODEC = "libx264"
+    H264_PRESET = "veryfast"
+    H264_CRF = 23
     PIXEL_FORMAT = "yuv420p"
     
+    # NVDEC/NVENC hardware video codecs (used when ffmpeg and the GPU support them)
+    USE_NVIDIA_CODECS = True
+    NVENC_CODEC = "h264_nvenc"
+    NVENC_ARGS = ("-preset", "p1", "-tune", "ll", "-rc", "vbr", "-b:v", "6M")
+    
+    # TensorRT export (used only when a CUDA device is available)
+    USE_TENSORRT = True
+    TENSORRT_HALF = True
+    TENSORRT_INT8 = False
+    TENSORRT_CALIBRATION_DATA: Optional[str] = None
+    TENSORRT_WORKSPACE = 4
+    MODEL_IMGSZ = 640
+    LETTERBOX_PAD_VALUE = 114
+    
+    # torch.compile for the PyTorch checkpoint (CUDA only)
+    TORCH_COMPILE = True
+    TORCH_COMPILE_MODE = "reduce-overhead"
+    
     # UI Configuration
     PAGE_TITLE = "PPE AI Safety Monitoring"
     PAGE_ICON = "🦺"
@@ -37,6 +79,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# BGR box colors indexed by class id
+BOX_COLORS = np.array([
+    [56, 56, 255],
+    [151, 157, 255],
+    [31, 112, 255],
+    [29, 178, 255],
+    [49, 210, 207],
+    [10, 249, 72],
+    [23, 204, 146],
+    [134, 219, 61],
+    [211, 188, 0],
+    [255, 115, 0],
+], dtype=np.uint8)
+
 st.set_page_config(
     page_title=Config.PAGE_TITLE,
     layout=Config.LAYOUT,
@@ -44,17 +100,244 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+def _engine_settings() -> Dict[str, object]:
+    """Settings an exported TensorRT engine must match to be reused"""
+    return {
+        "batch": Config.BATCH_SIZE,
+        "imgsz": Config.MODEL_IMGSZ,
+        "half": Config.TENSORRT_HALF,
+        "int8": bool(Config.TENSORRT_INT8 and Config.TENSORRT_CALIBRATION_DATA),
+        "calibration_data": Config.TENSORRT_CALIBRATION_DATA,
+        "device": torch.cuda.get_device_name(),
+        "torch": torch.__version__,
+    }
+
+def _engine_is_current(settings: Dict[str, object]) -> bool:
+    """Check that the exported engine is newer than best.pt and built with the current settings"""
+    try:
+        if Config.ENGINE_PATH.stat().st_mtime < Config.MODEL_PATH.stat().st_mtime:
+            return False
+        return json.loads(Config.ENGINE_SETTINGS_PATH.read_text()) == settings
+    except (OSError, ValueError):
+        return False
+
+def export_tensorrt_engine() -> Optional[Path]:
+    """
+    Export the PyTorch checkpoint to a TensorRT engine
+    
+    An existing engine is reused only if it is newer than the checkpoint
+    and was built with the current settings on this GPU; otherwise it is
+    rebuilt.
+    
+    Returns:
+        Path to the engine file, or None if TensorRT is unavailable
+    """
+    if not Config.USE_TENSORRT or not torch.cuda.is_available():
+        return None
+    
+    settings = _engine_settings()
+    if _engine_is_current(settings):
+        return Config.ENGINE_PATH
+    
+    if Config.TENSORRT_INT8 and not Config.TENSORRT_CALIBRATION_DATA:
+        logger.warning("TENSORRT_INT8 is set without TENSORRT_CALIBRATION_DATA, exporting FP16 instead")
+    
+    export_args = {
+        "format": "engine",
+        "half": Config.TENSORRT_HALF,
+        "dynamic": True,
+        "workspace": Config.TENSORRT_WORKSPACE,
+        "imgsz": Config.MODEL_IMGSZ,
+        "batch": Config.BATCH_SIZE,
+    }
+    if Config.TENSORRT_INT8 and Config.TENSORRT_CALIBRATION_DATA:
+        export_args.update(int8=True, data=Config.TENSORRT_CALIBRATION_DATA)
+    
+    try:
+        logger.info("Exporting TensorRT engine (one-time)")
+        engine_path = YOLO(str(Config.MODEL_PATH)).export(**export_args)
+        Config.ENGINE_PATH = Path(engine_path)
+        Config.ENGINE_SETTINGS_PATH.write_text(json.dumps(settings))
+        logger.info(f"TensorRT engine saved to {Config.ENGINE_PATH}")
+        return Config.ENGINE_PATH
+    except Exception as e:
+        logger.warning(f"TensorRT export failed, using PyTorch model: {str(e)}")
+        return None
+
+def letterbox_geometry(width: int, height: int) -> Tuple[float, Tuple[int, int], Tuple[int, int]]:
+    """
+    Compute how a frame is letterboxed into the fixed inference shape
+    
+    Every frame is fed to the model as a MODEL_IMGSZ x MODEL_IMGSZ image
+    regardless of the video's resolution, so compiled graphs, cuDNN
+    autotuning and TensorRT profiles only ever see one input shape.
+    
+    Args:
+        width: Source frame width
+        height: Source frame height
+        
+    Returns:
+        Tuple of (scale, (resized_w, resized_h), (pad_x, pad_y))
+    """
+    scale = Config.MODEL_IMGSZ / max(width, height)
+    new_w = min(Config.MODEL_IMGSZ, max(1, int(round(width * scale))))
+    new_h = min(Config.MODEL_IMGSZ, max(1, int(round(height * scale))))
+    pad = ((Config.MODEL_IMGSZ - new_w) // 2, (Config.MODEL_IMGSZ - new_h) // 2)
+    return scale, (new_w, new_h), pad
+
+def blank_inference_frame() -> np.ndarray:
+    """Return an empty letterbox canvas in the fixed inference shape"""
+    return np.full((Config.MODEL_IMGSZ, Config.MODEL_IMGSZ, 3), Config.LETTERBOX_PAD_VALUE, dtype=np.uint8)
+
+def optimize_torch_model(model: YOLO) -> None:
+    """
+    Tune a PyTorch YOLO model for fixed-shape CUDA inference
+    
+    Not used for TensorRT engines, which already pick their own kernels.
+    
+    Args:
+        model: YOLO model loaded from a .pt checkpoint
+    """
+    if not torch.cuda.is_available():
+        return
+    
+    torch.backends.cudnn.benchmark = True
+    torch.set_float32_matmul_precision("high")
+    
+    # Fuse before switching layout: fusing rebuilds conv weights, and
+    # Ultralytics skips fusion for models that are already fused
+    model.fuse()
+    model.model.to(memory_format=torch.channels_last)
+
+def compile_predictor_model(model: YOLO) -> None:
+    """
+    Wrap the network held by the predictor in torch.compile
+    
+    Must run after the first predict call: that call builds the predictor's
+    AutoBackend, which calls fuse() on model.model. On a compiled module
+    that returns the uncompiled network, so compiling model.model up front
+    would be silently dropped.
+    
+    Must also run on the thread that does inference: CUDA graph trees used
+    by the "reduce-overhead" mode keep their state per thread, so graphs
+    recorded during a warmup elsewhere would not be replayed.
+    
+    Args:
+        model: PyTorch YOLO model that has already run one prediction
+    """
+    backend = model.predictor.model
+    eager = backend.model
+    graphs_before = torch._dynamo.utils.counters["stats"]["unique_graphs"]
+    
+    try:
+        compiled = torch.compile(eager, mode=Config.TORCH_COMPILE_MODE)
+        backend.model = compiled
+        warmup_model(model)
+    except Exception as e:
+        logger.warning(f"torch.compile failed, using eager model: {str(e)}")
+        backend.model = eager
+        return
+    
+    graphs_after = torch._dynamo.utils.counters["stats"]["unique_graphs"]
+    if model.predictor.model.model is not compiled or graphs_after == graphs_before:
+        logger.warning("Compiled graph was not used, using eager model")
+        backend.model = eager
+        return
+    
+    logger.info("Model compiled with torch.compile")
+
+def install_pinned_preprocess(model: YOLO) -> None:
+    """
+    Replace the predictor's preprocess with a pinned-memory upload
+    
+    Frames reach the model already letterboxed to the fixed inference shape
+    and in RGB order (see _decode_worker), so Ultralytics' letterbox, BGR flip and
+    CPU transpose are unnecessary. The replacement stacks the batch into a
+    reusable page-locked buffer, uploads it as uint8 with non_blocking=True
+    and does the layout change and normalization on the device. The source
+    passed to the model stays a list of host arrays, so results keep their
+    host-side orig_img and nothing is copied back.
+    
+    Args:
+        model: Loaded YOLO model instance
+    """
+    state: Dict[str, torch.Tensor] = {}
+    
+    def preprocess(predictor, im: list) -> torch.Tensor:
+        n, (h, w) = len(im), im[0].shape[:2]
+        staging = state.get("staging")
+        if staging is None or staging.shape[0] < n or staging.shape[1:3] != (h, w):
+            staging = torch.empty(
+                (max(n, Config.BATCH_SIZE), h, w, 3),
+                dtype=torch.uint8,
+                pin_memory=torch.cuda.is_available()
+            )
+            state["staging"] = staging
+        
+        # The previous batch's detections were copied to the host before we get
+        # here, so no transfer is still reading the staging buffer
+        host = staging[:n]
+        np.stack(im, out=host.numpy())
+        x = host.to(predictor.device, non_blocking=True).permute(0, 3, 1, 2)
+        x = x.half() if predictor.model.fp16 else x.float()
+        return x.div_(255)
+    
+    def on_predict_start(predictor) -> None:
+        if not getattr(predictor, "_pinned_preprocess", False):
+            predictor.preprocess = types.MethodType(preprocess, predictor)
+            predictor._pinned_preprocess = True
+    
+    model.add_callback("on_predict_start", on_predict_start)
+
+def warmup_model(model: YOLO) -> None:
+    """
+    Run one batch through the model so predictor setup, compilation and
+    kernel selection happen at load time rather than on the first upload
+    
+    Args:
+        model: Loaded YOLO model instance
+    """
+    dummy = [blank_inference_frame()] * Config.BATCH_SIZE
+    model(
+        dummy,
+        conf=Config.CONFIDENCE_THRESHOLD,
+        imgsz=Config.MODEL_IMGSZ,
+        half=True,
+        verbose=False
+    )
+
 @st.cache_resource
 def load_yolo_model() -> YOLO:
     """
     Load and cache the YOLO model
     
+    Prefers a TensorRT engine when one exists or can be exported,
+    otherwise falls back to the PyTorch checkpoint. An engine that fails
+    to load or run also falls back to the checkpoint.
+    
     Returns:
         YOLO: Loaded YOLO model instance
     """
     try:
+        engine_path = export_tensorrt_engine()
+        if engine_path is not None:
+            try:
+                logger.info(f"Loading YOLO model from {engine_path}")
+                model = YOLO(str(engine_path), task="detect")
+                install_pinned_preprocess(model)
+                warmup_model(model)
+                logger.info("Model loaded successfully")
+                return model
+            except Exception as e:
+                logger.warning(f"TensorRT engine unusable, using PyTorch model: {str(e)}")
+        
         logger.info(f"Loading YOLO model from {Config.MODEL_PATH}")
-        model = YOLO(str(Config.MODEL_PATH))
+        model = YOLO(str(Config.MODEL_PATH), task="detect")
+        install_pinned_preprocess(model)
+        optimize_torch_model(model)
+        
+        if torch.cuda.is_available():
+            warmup_model(model)
         logger.info("Model loaded successfully")
         return model
     except Exception as e:
@@ -64,347 +347,17 @@ def load_yolo_model() -> YOLO:
 
 model = load_yolo_model()
 
+# Class names indexed by class id
+CLASS_NAMES = tuple(model.names[i] for i in range(len(model.names)))
+
+@st.cache_data
+def load_custom_css() -> str:
+    """Read the stylesheet once per process; reruns get the cached string"""
+    return f"<style>\n{Config.CSS_PATH.read_text()}</style>"
+
 def inject_custom_css() -> None:
     """Inject custom CSS styling into the Streamlit app"""
-    st.markdown("""
-    <style>
-        /* ========== GLOBAL STYLES ========== */
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap');
-        
-        * {
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        }
-        
-        .main {
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            padding: 2rem 3rem;
-        }
-        
-        /* ========== HEADER SECTION ========== */
-        .header-container {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 3.5rem 3rem;
-            border-radius: 24px;
-            margin-bottom: 3rem;
-            box-shadow: 0 20px 60px rgba(102, 126, 234, 0.4);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .header-container::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: url("data:image/svg+xml,%3Csvg width='60' height='60' viewBox='0 0 60 60' xmlns='http://www.w3.org/2000/svg'%3E%3Cg fill='none' fill-rule='evenodd'%3E%3Cg fill='%23ffffff' fill-opacity='0.05'%3E%3Cpath d='M36 34v-4h-2v4h-4v2h4v4h2v-4h4v-2h-4zm0-30V0h-2v4h-4v2h4v4h2V6h4V4h-4zM6 34v-4H4v4H0v2h4v4h2v-4h4v-2H6zM6 4V0H4v4H0v2h4v4h2V6h4V4H6z'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E");
-            opacity: 0.4;
-        }
-        
-        .header-content {
-            position: relative;
-            z-index: 1;
-        }
-        
-        .header-container h1 {
-            font-size: 3.2rem;
-            font-weight: 800;
-            color: white;
-            margin: 0 0 0.5rem 0;
-            letter-spacing: -1px;
-        }
-        
-        .header-container .subtitle {
-            font-size: 1.3rem;
-            color: rgba(255, 255, 255, 0.95);
-            font-weight: 500;
-            margin: 0;
-        }
-        
-        .header-badge {
-            display: inline-block;
-            background: rgba(255, 255, 255, 0.2);
-            backdrop-filter: blur(10px);
-            padding: 0.5rem 1.2rem;
-            border-radius: 50px;
-            font-size: 0.9rem;
-            font-weight: 600;
-            color: white;
-            margin-top: 1.5rem;
-            border: 1px solid rgba(255, 255, 255, 0.3);
-        }
-        
-        /* ========== CARD COMPONENTS ========== */
-        .pro-card {
-            background: white;
-            border: 1px solid rgba(0, 0, 0, 0.08);
-            padding: 2.5rem;
-            border-radius: 20px;
-            box-shadow: 0 10px 40px rgba(0, 0, 0, 0.08);
-            margin-bottom: 2rem;
-            transition: all 0.3s ease;
-        }
-        
-        .pro-card:hover {
-            border-color: rgba(102, 126, 234, 0.3);
-            box-shadow: 0 15px 50px rgba(102, 126, 234, 0.15);
-        }
-        
-        .pro-card h3 {
-            color: #1a202c;
-            font-size: 1.5rem;
-            font-weight: 700;
-            margin-bottom: 1.5rem;
-            display: flex;
-            align-items: center;
-            gap: 0.8rem;
-        }
-        
-        .card-icon {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            width: 40px;
-            height: 40px;
-            border-radius: 10px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 1.2rem;
-        }
-        
-       
-        .info-grid {
-            display: grid;
-            grid-template-columns: repeat(2, 1fr);
-            gap: 1.2rem;
-            margin-top: 1rem;
-        }
-        
-        .info-item {
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            padding: 1.2rem;
-            border-radius: 12px;
-            border: 1px solid rgba(0, 0, 0, 0.06);
-        }
-        
-        .info-label {
-            font-size: 0.85rem;
-            color: #6c757d;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            font-weight: 600;
-            margin-bottom: 0.5rem;
-        }
-        
-        .info-value {
-            font-size: 1.1rem;
-            color: #1a202c;
-            font-weight: 600;
-        }
-        
-        /* ========== STATS OVERVIEW ========== */
-        .stats-overview {
-            display: grid;
-            grid-template-columns: repeat(3, 1fr);
-            gap: 1.5rem;
-            margin-bottom: 2rem;
-        }
-        
-        .stat-box {
-            background: white;
-            padding: 2rem;
-            border-radius: 16px;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.08);
-            border: 1px solid rgba(0, 0, 0, 0.06);
-            text-align: center;
-            transition: all 0.3s ease;
-        }
-        
-        .stat-box:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 8px 30px rgba(102, 126, 234, 0.2);
-        }
-        
-        .stat-icon {
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-        }
-        
-        .stat-number {
-            font-size: 2.2rem;
-            font-weight: 800;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            margin-bottom: 0.5rem;
-        }
-        
-        .stat-desc {
-            font-size: 0.95rem;
-            color: #6c757d;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }
-        
-        /* ========== FEATURE HIGHLIGHTS ========== */
-        .features-grid {
-            display: grid;
-            grid-template-columns: repeat(2, 1fr);
-            gap: 1.5rem;
-            margin-top: 2rem;
-        }
-        
-        .feature-item {
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            padding: 1.5rem;
-            border-radius: 12px;
-            border: 1px solid rgba(0, 0, 0, 0.06);
-            transition: all 0.3s ease;
-        }
-        
-        .feature-item:hover {
-            transform: translateX(5px);
-            border-color: rgba(102, 126, 234, 0.3);
-        }
-        
-        .feature-icon {
-            font-size: 1.8rem;
-            margin-bottom: 0.8rem;
-        }
-        
-        .feature-title {
-            font-size: 1.1rem;
-            font-weight: 700;
-            color: #1a202c;
-            margin-bottom: 0.5rem;
-        }
-        
-        .feature-desc {
-            font-size: 0.9rem;
-            color: #6c757d;
-            line-height: 1.5;
-        }
-        
-        /* ========== ALERTS & MESSAGES ========== */
-        .stAlert {
-            background: rgba(102, 126, 234, 0.1) !important;
-            border: 1px solid rgba(102, 126, 234, 0.3) !important;
-            border-radius: 12px !important;
-            color: #1a202c !important;
-        }
-        
-        .stSuccess {
-            background: rgba(52, 211, 153, 0.1) !important;
-            border: 1px solid rgba(52, 211, 153, 0.3) !important;
-        }
-        
-        /* ========== VIDEO CONTAINERS ========== */
-        .video-container {
-            background: #f8f9fa;
-            padding: 1.5rem;
-            border-radius: 16px;
-            border: 1px solid rgba(0, 0, 0, 0.08);
-        }
-        
-        .video-label {
-            font-size: 1rem;
-            font-weight: 600;
-            color: #1a202c;
-            margin-bottom: 1rem;
-            display: block;
-        }
-        
-        /* ========== BUTTONS ========== */
-        .stButton > button {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-            color: white !important;
-            border: none !important;
-            padding: 0.9rem 2rem !important;
-            border-radius: 12px !important;
-            font-weight: 600 !important;
-            font-size: 1.05rem !important;
-            transition: all 0.3s ease !important;
-            box-shadow: 0 8px 20px rgba(102, 126, 234, 0.4) !important;
-        }
-        
-        .stButton > button:hover {
-            transform: translateY(-2px) !important;
-            box-shadow: 0 12px 30px rgba(102, 126, 234, 0.6) !important;
-        }
-        
-        .stDownloadButton > button {
-            background: linear-gradient(135deg, #34d399 0%, #059669 100%) !important;
-            box-shadow: 0 8px 20px rgba(52, 211, 153, 0.4) !important;
-        }
-        
-        .stDownloadButton > button:hover {
-            box-shadow: 0 12px 30px rgba(52, 211, 153, 0.6) !important;
-        }
-        
-        /* ========== FILE UPLOADER ========== */
-        .stFileUploader {
-            background: rgba(102, 126, 234, 0.03);
-            border: 2px dashed rgba(102, 126, 234, 0.4);
-            border-radius: 16px;
-            padding: 2rem;
-            transition: all 0.3s ease;
-        }
-        
-        .stFileUploader:hover {
-            border-color: rgba(102, 126, 234, 0.7);
-            background: rgba(102, 126, 234, 0.08);
-        }
-        
-        /* ========== PROGRESS BAR ========== */
-        .stProgress > div > div {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        }
-        
-        /* ========== FOOTER ========== */
-        .footer-container {
-            background: white;
-            border-top: 1px solid rgba(0, 0, 0, 0.08);
-            padding: 2rem;
-            border-radius: 16px;
-            text-align: center;
-            margin-top: 4rem;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.05);
-        }
-        
-        .footer-text {
-            color: #6c757d;
-            font-size: 0.95rem;
-            margin: 0;
-        }
-        
-        .footer-links {
-            display: flex;
-            gap: 2rem;
-            justify-content: center;
-            margin-top: 1rem;
-        }
-        
-        .footer-link {
-            color: rgba(102, 126, 234, 0.8);
-            text-decoration: none;
-            font-weight: 500;
-            transition: color 0.3s ease;
-        }
-        
-        .footer-link:hover {
-            color: #667eea;
-        }
-        
-        /* ========== EXPANDER ========== */
-        .streamlit-expanderHeader {
-            background: #f8f9fa;
-            border-radius: 8px;
-            font-weight: 600;
-            color: #1a202c;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(load_custom_css(), unsafe_allow_html=True)
 
 # ================= UI COMPONENTS =================
 def render_header() -> None:
@@ -567,10 +520,79 @@ def render_footer() -> None:
 
 def save_uploaded_file(uploaded_file, destination: Path) -> None:
    
-    with open(destination, "wb") as f:
-        f.write(uploaded_file.read())
+    # Write under a temporary name so a partial upload is never seen at the
+    # content-addressed path
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=destination.parent, prefix=f"{destination.stem}.", suffix=".tmp", delete=False
+    ) as f:
+        temp_path = Path(f.name)
+        try:
+            shutil.copyfileobj(uploaded_file, f, 1024 * 1024)
+        except BaseException:
+            f.close()
+            temp_path.unlink(missing_ok=True)
+            raise
+    os.replace(temp_path, destination)
     logger.info(f"Saved uploaded file to {destination}")
 
+def hash_uploaded_file(uploaded_file) -> str:
+    """
+    Hash the uploaded file contents to key the output cache
+    
+    Args:
+        uploaded_file: Uploaded video file
+        
+    Returns:
+        Hex digest prefix identifying the file contents
+    """
+    digest = hashlib.blake2b()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()[:16]
+
+def evict_output_cache(keep: set) -> None:
+    """
+    Delete least recently used uploads and outputs until both directories
+    together fit the cache size limit
+    
+    Args:
+        keep: IDs of entries that must not be evicted (jobs still in flight)
+    """
+    # Files can be replaced or evicted by another session while we scan
+    entries: Dict[str, list] = {}
+    for directory in (Config.UPLOAD_DIR, Config.OUTPUT_DIR):
+        for path in directory.iterdir():
+            try:
+                st_result = path.stat()
+            except FileNotFoundError:
+                continue
+            uid = path.name.split("_", 1)[0].split(".", 1)[0]
+            entries.setdefault(uid, []).append((path, st_result.st_size, st_result.st_mtime))
+    
+    def entry_mtime(files: list) -> float:
+        return max(mtime for _, _, mtime in files)
+    
+    def upload_in_progress(files: list) -> bool:
+        now = time.time()
+        return any(
+            path.suffix == ".tmp" and now - mtime < Config.TEMP_FILE_MAX_AGE
+            for path, _, mtime in files
+        )
+    
+    total = sum(size for files in entries.values() for _, size, _ in files)
+    for uid, files in sorted(entries.items(), key=lambda e: entry_mtime(e[1])):
+        if total <= Config.OUTPUT_CACHE_MAX_BYTES:
+            break
+        if uid in keep or upload_in_progress(files):
+            continue
+        for path, size, _ in files:
+            total -= size
+            path.unlink(missing_ok=True)
+        logger.info(f"Evicted cached output {uid}")
+
 def get_video_properties(video_path: str) -> Tuple[float, int, int, int]:
    
     cap = cv2.VideoCapture(video_path)
@@ -582,6 +604,238 @@ def get_video_properties(video_path: str) -> Tuple[float, int, int, int]:
     
     return fps, width, height, total_frames
 
+def draw_detections(
+    frame: np.ndarray,
+    detections: Tuple[np.ndarray, np.ndarray, np.ndarray]
+) -> np.ndarray:
+    """
+    Draw detection boxes and labels in place on a frame
+    
+    Args:
+        frame: Full-resolution BGR frame
+        detections: Host-side (xyxy, classes, confs) arrays, boxes already
+            scaled to the frame
+        
+    Returns:
+        The annotated frame (same array as frame)
+    """
+    xyxy, classes, confs = detections
+    
+    for (x1, y1, x2, y2), c, conf in zip(xyxy, classes, confs):
+        color = BOX_COLORS[c % len(BOX_COLORS)].tolist()
+        name = CLASS_NAMES[c]
+        (tw, th), baseline = _label_size(name)
+        
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, Config.BOX_THICKNESS)
+        top = max(y1 - th - baseline, 0)
+        cv2.rectangle(frame, (x1, top), (x1 + tw, top + th + baseline), color, cv2.FILLED)
+        cv2.putText(
+            frame, f"{name} {conf:.2f}", (x1, top + th),
+            cv2.FONT_HERSHEY_SIMPLEX, Config.LABEL_FONT_SCALE,
+            (255, 255, 255), 1, cv2.LINE_AA
+        )
+    
+    return frame
+
+@lru_cache(maxsize=None)
+def _label_size(name: str) -> Tuple[Tuple[int, int], int]:
+    """Cached label background size for a class name (with a 0.00 confidence)"""
+    return cv2.getTextSize(f"{name} 0.00", cv2.FONT_HERSHEY_SIMPLEX, Config.LABEL_FONT_SCALE, 1)
+
+def _put_until_stopped(q: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """Put an item on a bounded queue, giving up if the pipeline is stopped"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get_until_stopped(q: queue.Queue, stop_event: threading.Event):
+    """Get an item from a queue, returning None if the pipeline is stopped"""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+@lru_cache(maxsize=None)
+def nvidia_codecs_available() -> bool:
+    """
+    Check whether ffmpeg can use NVDEC/NVENC on this machine
+    
+    NVENC support is probed by encoding a single test frame, since the
+    encoder being compiled into ffmpeg says nothing about the GPU, driver
+    or free encoder sessions.
+    """
+    if not Config.USE_NVIDIA_CODECS or not torch.cuda.is_available():
+        return False
+    
+    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+    try:
+        hwaccels = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-hwaccels"],
+            capture_output=True, text=True, timeout=30
+        ).stdout
+        probe = subprocess.run(
+            [
+                ffmpeg_path, "-v", "error",
+                "-f", "lavfi", "-i", "color=s=256x256",
+                "-frames:v", "1",
+                "-c:v", Config.NVENC_CODEC,
+                "-f", "null", "-"
+            ],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    
+    available = "cuda" in hwaccels and probe.returncode == 0
+    logger.info(f"NVIDIA hardware video codecs available: {available}")
+    return available
+
+def open_frame_reader(input_path: str) -> subprocess.Popen:
+    """
+    Start an ffmpeg process that decodes a video to raw BGR frames on stdout
+    
+    Args:
+        input_path: Input video path
+        
+    Returns:
+        The running ffmpeg process
+    """
+    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+    
+    cmd = [ffmpeg_path, "-v", "error"]
+    if nvidia_codecs_available():
+        cmd += ["-hwaccel", "cuda"]
+    cmd += [
+        "-i", input_path,
+        "-f", "rawvideo",
+        "-pix_fmt", "bgr24",
+        "-"
+    ]
+    
+    return subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+
+def _decode_worker(
+    reader: subprocess.Popen,
+    frame_shape: Tuple[int, int, int],
+    resized_size: Tuple[int, int],
+    pad: Tuple[int, int],
+    decode_q: queue.Queue,
+    progress: Dict[str, int],
+    stop_event: threading.Event
+) -> None:
+    """
+    Decode stage: read raw frames from ffmpeg and group them for inference
+    
+    Every Config.FRAME_STRIDE-th frame is letterboxed into an RGB inference
+    canvas; the frames after it share its detections. Each queue item is
+    (last_frame_id, frames, small) for one such group. Reaching the end of
+    the stream sets progress["decoded"]; failures are stored in
+    progress["decode_error"].
+    """
+    stride = Config.FRAME_STRIDE
+    frame_id = 0
+    frames, small = [], None
+    (resized_w, resized_h), (pad_x, pad_y) = resized_size, pad
+    try:
+        while not stop_event.is_set():
+            frame = np.empty(frame_shape, dtype=np.uint8)
+            if reader.stdout.readinto(frame.data) != frame.nbytes:
+                progress["decoded"] = True
+                break
+            
+            if frame_id % stride == 0:
+                if frames and not _put_until_stopped(decode_q, (frame_id, frames, small), stop_event):
+                    return
+                resized = cv2.resize(frame, resized_size, interpolation=cv2.INTER_LINEAR)
+                small = blank_inference_frame()
+                small[pad_y:pad_y + resized_h, pad_x:pad_x + resized_w] = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+                frames = []
+            
+            frame_id += 1
+            frames.append(frame)
+        
+        if frames:
+            _put_until_stopped(decode_q, (frame_id, frames, small), stop_event)
+    except Exception as e:
+        progress["decode_error"] = e
+    finally:
+        _put_until_stopped(decode_q, None, stop_event)
+
+def open_h264_writer(output_path: str, fps: float, width: int, height: int) -> subprocess.Popen:
+    """
+    Start an ffmpeg process that encodes raw BGR frames from stdin to H.264
+    
+    Args:
+        output_path: Output video path
+        fps: Output frame rate
+        width: Frame width
+        height: Frame height
+        
+    Returns:
+        The running ffmpeg process
+    """
+    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+    
+    if nvidia_codecs_available():
+        codec_args = ["-c:v", Config.NVENC_CODEC, *Config.NVENC_ARGS]
+    else:
+        codec_args = [
+            "-c:v", Config.H264_CODEC,
+            "-preset", Config.H264_PRESET,
+            "-crf", str(Config.H264_CRF),
+            "-threads", "0"
+        ]
+    
+    cmd = [
+        ffmpeg_path, "-y",
+        "-f", "rawvideo",
+        "-pix_fmt", "bgr24",
+        "-s", f"{width}x{height}",
+        "-r", str(fps),
+        "-i", "-",
+        *codec_args,
+        "-pix_fmt", Config.PIXEL_FORMAT,
+        "-movflags", "+faststart",
+        output_path
+    ]
+    
+    return subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+def _encode_worker(
+    writer: subprocess.Popen,
+    encode_q: queue.Queue,
+    progress: Dict[str, int],
+    stop_event: threading.Event
+) -> None:
+    """Encode stage: annotate frames and write them to the output video"""
+    try:
+        while True:
+            item = encode_q.get()
+            if item is None:
+                break
+            frame_id, frames, detections = item
+            for frame in frames:
+                writer.stdin.write(draw_detections(frame, detections).data)
+            progress["written"] = frame_id
+    except Exception as e:
+        progress["error"] = e
+        stop_event.set()
+
 def process_video_with_yolo(
     input_path: str,
     output_path: str,
@@ -591,6 +845,10 @@ def process_video_with_yolo(
     """
     Process video with YOLO detection
     
+    Decoding, inference and encoding run as a pipeline: a decode thread
+    and an encode thread are connected to the inference loop by bounded
+    queues, so CPU-side video I/O overlaps with GPU inference.
+    
     Args:
         input_path: Input video path
         output_path: Output video path
@@ -600,88 +858,282 @@ def process_video_with_yolo(
     Returns:
         Counter with detection statistics
     """
-    stats = Counter()
-    cap = cv2.VideoCapture(input_path)
+    # Per-class detection histogram indexed by class id
+    nc = len(CLASS_NAMES)
+    stats = np.zeros(nc, dtype=np.int64)
     
     fps, width, height, total_frames = get_video_properties(input_path)
     
-    out = cv2.VideoWriter(
-        output_path,
-        cv2.VideoWriter_fourcc(*Config.VIDEO_CODEC),
-        fps,
-        (width, height)
-    )
+    # Frames are letterboxed once in the decode stage; boxes are mapped back when drawing
+    scale, resized_size, pad = letterbox_geometry(width, height)
+    box_offset = np.array(pad * 2, dtype=np.float32)
+    
+    reader = open_frame_reader(input_path)
+    writer = open_h264_writer(output_path, fps, width, height)
+    
+    # Queue items are groups of FRAME_STRIDE frames
+    queue_size = max(1, Config.PIPELINE_QUEUE_SIZE // Config.FRAME_STRIDE)
+    decode_q = queue.Queue(maxsize=queue_size)
+    encode_q = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    progress = {"written": 0}
+    
+    decoder = threading.Thread(target=_decode_worker, args=(reader, (height, width, 3), resized_size, pad, decode_q, progress, stop_event), daemon=True)
+    encoder = threading.Thread(target=_encode_worker, args=(writer, encode_q, progress, stop_event), daemon=True)
     
-    frame_id = 0
     logger.info("Starting PPE detection")
+    decoder.start()
+    encoder.start()
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_id += 1
-        
-        # Run YOLO detection
-        results = model(frame, conf=Config.CONFIDENCE_THRESHOLD, verbose=False)
-        
-        # Extract detections
-        if len(results[0].boxes) > 0:
-            classes = results[0].boxes.cls.cpu().numpy().astype(int)
-            names = [model.names[c] for c in classes]
-            counts = Counter(names)
-            stats.update(counts)
-            logger.info(f"Frame {frame_id}/{total_frames}: {dict(counts)}")
-        
-        # Update progress
-        if progress_callback and total_frames > 0:
-            progress_callback(frame_id, total_frames)
-        
-        # Write annotated frame
-        annotated = results[0].plot()
-        out.write(annotated)
+    try:
+        finished = False
+        last_frame_id = 0
+        while not finished and not stop_event.is_set():
+            # Collect a batch of frame groups from the decode stage
+            batch_ids, groups, batch = [], [], []
+            while len(batch) < Config.BATCH_SIZE:
+                item = _get_until_stopped(decode_q, stop_event)
+                if item is None:
+                    finished = True
+                    break
+                batch_ids.append(item[0])
+                groups.append(item[1])
+                batch.append(item[2])
+            
+            if not batch:
+                break
+            
+            # Pad a short final batch so the model always sees the warmed-up shape
+            n = len(batch)
+            batch += [blank_inference_frame()] * (Config.BATCH_SIZE - n)
+            
+            # Run YOLO detection on the whole batch (uploaded by the pinned preprocess)
+            results_list = model(
+                batch,
+                conf=Config.CONFIDENCE_THRESHOLD,
+                imgsz=Config.MODEL_IMGSZ,
+                half=torch.cuda.is_available(),
+                verbose=False
+            )[:n]
+            
+            # Move the whole batch's detections to the host with a single
+            # device-to-host copy; rows are (x1, y1, x2, y2, conf, cls)
+            lengths = [len(r.boxes) for r in results_list]
+            data = torch.cat([r.boxes.data for r in results_list]).cpu().numpy()
+            classes = data[:, -1].astype(np.int32)
+            confs = data[:, -2]
+            xyxy = ((data[:, :4] - box_offset) / scale).astype(np.int32)
+            
+            # Each group's detections count once per frame in the group
+            weights = np.repeat([len(frames) for frames in groups], lengths)
+            stats += np.bincount(classes, weights=weights, minlength=nc).astype(np.int64)
+            
+            splits = np.cumsum(lengths)[:-1]
+            detections = zip(
+                np.split(xyxy, splits),
+                np.split(classes, splits),
+                np.split(confs, splits)
+            )
+            
+            if batch_ids[-1] // Config.LOG_EVERY_N_FRAMES > last_frame_id // Config.LOG_EVERY_N_FRAMES:
+                logger.info("Frame %d/%d", batch_ids[-1], total_frames)
+            last_frame_id = batch_ids[-1]
+            
+            for frame_id, frames, dets in zip(batch_ids, groups, detections):
+                if not _put_until_stopped(encode_q, (frame_id, frames, dets), stop_event):
+                    break
+            
+            # Update progress
+            if progress_callback and total_frames > 0:
+                progress_callback(min(progress["written"], total_frames), total_frames)
+    finally:
+        _put_until_stopped(encode_q, None, stop_event)
+        encoder.join()
+        stop_event.set()
+        reader_terminated = not progress.get("decoded") and reader.poll() is None
+        if reader_terminated:
+            reader.terminate()
+        decoder.join()
+        reader.stdout.close()
+        reader.wait()
+        try:
+            writer.stdin.close()
+        except BrokenPipeError:
+            pass
+        writer.wait()
+    
+    if "error" in progress:
+        raise progress["error"]
+    
+    if "decode_error" in progress:
+        raise progress["decode_error"]
+    
+    if not reader_terminated and reader.returncode != 0:
+        raise RuntimeError(f"ffmpeg decoder exited with code {reader.returncode}")
+    
+    if writer.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with code {writer.returncode}")
+    
+    if progress_callback and total_frames > 0:
+        progress_callback(min(progress["written"], total_frames), total_frames)
     
-    cap.release()
-    out.release()
     logger.info("PPE detection completed")
     
-    return stats
+    return Counter({CLASS_NAMES[i]: int(stats[i]) for i in np.nonzero(stats)[0]})
 
-def encode_to_h264(input_path: str, output_path: str) -> None:
-   
-    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+@dataclass
+class InferenceJob:
+    """A video queued for detection on the inference worker"""
+    uid: str
+    input_path: Path
+    output_path: Path
+    stats_path: Path
+    progress: Tuple[int, int] = (0, 0)
+    stats: Optional[Counter] = None
+    error: Optional[Exception] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+@dataclass
+class InferenceWorker:
+    """Job queue and in-flight jobs of the shared inference worker"""
+    job_q: queue.Queue = field(default_factory=queue.Queue)
+    jobs: Dict[str, InferenceJob] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
     
-    cmd = [
-        ffmpeg_path, "-y",
-        "-i", input_path,
-        "-vcodec", Config.H264_CODEC,
-        "-pix_fmt", Config.PIXEL_FORMAT,
-        "-movflags", "+faststart",
-        output_path
-    ]
+    def submit(self, uid: str, input_path: Path, output_path: Path, stats_path: Path) -> InferenceJob:
+        """Queue a job for uid, or return the one already in flight"""
+        with self.lock:
+            job = self.jobs.get(uid)
+            if job is None:
+                job = InferenceJob(uid, input_path, output_path, stats_path)
+                self.jobs[uid] = job
+                self.job_q.put(job)
+            return job
+    
+    def active_uids(self) -> set:
+        """IDs of jobs that are queued or running"""
+        with self.lock:
+            return set(self.jobs)
+
+def load_cached_stats(output_path: Path, stats_path: Path) -> Optional[Counter]:
+    """
+    Return cached detection stats if a complete output exists
+    
+    The stats sidecar is written only after the output video is in place,
+    so its presence marks a finished run.
+    """
+    if not (output_path.exists() and stats_path.exists()):
+        return None
+    try:
+        # Bump mtimes for LRU eviction (unlike touch(), utime won't recreate a missing file)
+        os.utime(output_path)
+        os.utime(stats_path)
+        return Counter(json.loads(stats_path.read_text()))
+    except FileNotFoundError:
+        # Evicted between the check and the read
+        return None
+
+def _run_inference_job(job: InferenceJob, model: YOLO, worker: InferenceWorker) -> None:
+    """Process one job into its cached output and stats sidecar"""
+    cached = load_cached_stats(job.output_path, job.stats_path)
+    if cached is not None:
+        job.stats = cached
+        return
+    
+    def report(current: int, total: int) -> None:
+        job.progress = (current, total)
+    
+    # Encode to a temporary file so a finished output is never overwritten
+    # while another session may be serving it
+    temp_path = job.output_path.with_name(f"{job.uid}_final.tmp.mp4")
+    try:
+        stats = process_video_with_yolo(str(job.input_path), str(temp_path), model, report)
+        os.replace(temp_path, job.output_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    
+    temp_stats = job.stats_path.with_name(f"{job.uid}.tmp.json")
+    temp_stats.write_text(json.dumps(stats))
+    os.replace(temp_stats, job.stats_path)
+    job.stats = stats
+    
+    evict_output_cache(keep=worker.active_uids())
+
+def _inference_worker_loop(worker: InferenceWorker, model: YOLO) -> None:
+    """Run queued detection jobs one at a time on the shared model"""
+    # Compile here rather than at load time so CUDA graphs are recorded on
+    # the thread that replays them; jobs submitted meanwhile wait in the queue
+    if Config.TORCH_COMPILE and torch.cuda.is_available() and isinstance(model.model, torch.nn.Module):
+        compile_predictor_model(model)
     
-    logger.info("Starting H.264 encoding")
-    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    logger.info("H.264 encoding completed")
+    while True:
+        job = worker.job_q.get()
+        try:
+            _run_inference_job(job, model, worker)
+        except Exception as e:
+            logger.error(f"Inference job failed: {str(e)}")
+            job.error = e
+            # Nothing will reference the upload of a failed job; it is saved again on retry
+            job.input_path.unlink(missing_ok=True)
+        finally:
+            with worker.lock:
+                worker.jobs.pop(job.uid, None)
+            job.done.set()
+
+@st.cache_resource
+def get_inference_worker(_model: YOLO) -> InferenceWorker:
+    """
+    Start the inference worker once per process
+    
+    All sessions submit to the same worker, so the model is owned by a
+    single thread and concurrent uploads don't run it in parallel. The
+    worker writes outputs and stats sidecars itself, so results are
+    cached even if the submitting session goes away.
+    
+    Args:
+        _model: YOLO model instance (not hashed by Streamlit)
+        
+    Returns:
+        The shared InferenceWorker
+    """
+    worker = InferenceWorker()
+    threading.Thread(
+        target=_inference_worker_loop,
+        args=(worker, _model),
+        name="inference-worker",
+        daemon=True
+    ).start()
+    logger.info("Inference worker started")
+    return worker
 
 def process_uploaded_video(uploaded_file) -> Tuple[Optional[str], Optional[str], Counter]:
     """
     Main video processing pipeline
     
+    Outputs are cached by a hash of the uploaded contents, so re-uploading
+    the same video returns the previous result without running detection,
+    and sessions uploading the same video at once share one job.
+    
     Args:
         uploaded_file: Uploaded video file
         
     Returns:
         Tuple of (input_path, output_path, statistics)
     """
-    # Generate unique ID
-    uid = str(uuid.uuid4())
+    # Content-addressed ID
+    uid = hash_uploaded_file(uploaded_file)
     input_path = Config.UPLOAD_DIR / f"{uid}.mp4"
-    temp_path = Config.OUTPUT_DIR / f"{uid}_temp.mp4"
     final_path = Config.OUTPUT_DIR / f"{uid}_final.mp4"
+    stats_path = Config.OUTPUT_DIR / f"{uid}.json"
     
     # Save uploaded file
-    save_uploaded_file(uploaded_file, input_path)
+    if not input_path.exists():
+        save_uploaded_file(uploaded_file, input_path)
+    
+    stats = load_cached_stats(final_path, stats_path)
+    if stats is not None:
+        logger.info(f"Using cached output for {uid}")
+        return str(input_path), str(final_path), stats
     
     # Process video with progress tracking
     progress_bar = st.progress(0)
@@ -692,26 +1144,30 @@ def process_uploaded_video(uploaded_file) -> Tuple[Optional[str], Optional[str],
         progress_bar.progress(progress)
         status_text.text(f"Processing frame {current} of {total}")
     
+    job = get_inference_worker(model).submit(uid, input_path, final_path, stats_path)
+    
     with st.spinner("🔍 Analyzing video for PPE compliance..."):
-        stats = process_video_with_yolo(
-            str(input_path),
-            str(temp_path),
-            model,
-            update_progress
-        )
+        while not job.done.wait(timeout=Config.JOB_POLL_INTERVAL):
+            current, total = job.progress
+            if total > 0:
+                update_progress(current, total)
+            else:
+                status_text.text("Waiting for the inference worker...")
     
     progress_bar.empty()
     status_text.empty()
     
-    # Encode to H.264
-    with st.spinner("📦 Encoding output video..."):
-        encode_to_h264(str(temp_path), str(final_path))
+    if job.error is not None:
+        raise job.error
     
-    return str(input_path), str(final_path), stats
+    return str(input_path), str(final_path), job.stats
 
 # ================= MAIN APPLICATION =================
 def main():
     """Main application entry point"""
+    # Start the worker (and its one-time compilation) before the first upload
+    get_inference_worker(model)
+    
     # Inject custom CSS
     inject_custom_css()
     